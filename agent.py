@@ -6,8 +6,9 @@ from datetime import datetime
 from pathlib import Path
 
 from data_loader import load_structured, parse_unstructured
-from generators import build_customer_map, gen_transaction
 from engine import run_compliance
+from dedup import get_seen_store
+from rules import RULE_META, required_columns
 from config import (
     STRUCTURED_EXT,
     UNSTRUCTURED_EXT,
@@ -19,39 +20,67 @@ from config import (
     SOF_AMOUNT_THRESHOLD,
     VELOCITY_TXN_THRESHOLD_DEFAULT,
     VELOCITY_WINDOW_MINUTES_DEFAULT,
-    GEOJUMP_WINDOW_MINUTES_DEFAULT
+    GEOJUMP_WINDOW_MINUTES_DEFAULT,
+    COMPLIANCE_WORKERS_DEFAULT,
+    SKETCH_MODE_DEFAULT,
+    EXPORT_DIR,
+    EXPORT_FORMAT_DEFAULT
 )
 
+# export (csv/gzip), triage (heapq) and rescreen (sqlite3) are imported by
+# the steps that use them so the agent stays inside its import budget.
+
 # Directories for incoming and processed files
 INPUT_DIR = Path("data/incoming")
 PROCESSED_DIR = Path("data/processed")
 
 def fetch_latest_transactions():
     """
-    Load all files from INPUT_DIR (structured or unstructured).
-    Then move them to PROCESSED_DIR. If no files, generate mock data.
+    Load all files from INPUT_DIR (structured or unstructured) and return
+    (transactions, files). The files stay in INPUT_DIR until
+    archive_files() moves them to PROCESSED_DIR after a successful run.
+    If no files, generate mock data. Transactions whose tx_id was already
+    ingested (re-delivered or duplicated files) are dropped.
     """
+    from rescreen import file_key, get_history_index
+
     transactions = []
+    files = []
     INPUT_DIR.mkdir(parents=True, exist_ok=True)
     PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
 
+    # All rules run headless, so project onto the union of their fields
+    columns = required_columns(RULE_META)
+
     for file in INPUT_DIR.iterdir():
         ext = file.suffix.lstrip(".").lower()
-        with file.open("rb") as f:
-            if ext in STRUCTURED_EXT:
-                transactions.extend(load_structured(f, ext))
-            elif ext in UNSTRUCTURED_EXT:
-                transactions.extend(parse_unstructured(f))
-        # Move file after processing
-        dest = PROCESSED_DIR / file.name
-        file.replace(dest)
+        if ext in STRUCTURED_EXT:
+            # Pass the path so columnar files can be memory-mapped
+            file_txs = load_structured(file, ext, columns)
+        elif ext in UNSTRUCTURED_EXT:
+            with file.open("rb") as f:
+                file_txs = parse_unstructured(f)
+        else:
+            file_txs = []
+        # Index for retroactive re-screening before the file is archived
+        get_history_index().add_file(file_key(file), file_txs)
+        transactions.extend(file_txs)
+        files.append(file)
 
     if not transactions:
-        # Fallback: mock data
+        # Fallback: mock data (Faker is slow to import, so only load it here)
+        from generators import build_customer_map, gen_transaction
         customer_map = build_customer_map()
         transactions = [gen_transaction(customer_map) for _ in range(200)]
+    else:
+        transactions = get_seen_store().filter_new(transactions)
 
-    return transactions
+    return transactions, files
+
+def archive_files(files):
+    """Move processed input files to PROCESSED_DIR."""
+    for file in files:
+        file.replace(PROCESSED_DIR / file.name)
 
 def send_alerts(alerts):
     """
@@ -61,6 +90,20 @@ def send_alerts(alerts):
     for rule, entity, detail in alerts:
         print(f"[{datetime.utcnow().isoformat()}] ALERT: {rule} - {entity} - {detail}")
 
+def export_run_alerts(alerts, fmt=EXPORT_FORMAT_DEFAULT):
+    """
+    Stream this run's alerts to EXPORT_DIR as CSV, gzip CSV or Parquet.
+    """
+    from export import EXPORT_FORMATS, alert_records, export_alerts
+
+    suffix, _ = EXPORT_FORMATS[fmt]
+    export_dir = Path(EXPORT_DIR)
+    export_dir.mkdir(parents=True, exist_ok=True)
+    dest = export_dir / f"alerts-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.{suffix}"
+    count = export_alerts(alert_records(alerts), dest, fmt)
+    logging.info(f"Exported {count} alerts to {dest}")
+    return dest
+
 def adjust_thresholds(alerts):
     """
     Placeholder for threshold tuning logic based on false-positive rates.
@@ -88,8 +131,18 @@ def main():
     )
     logging.info("=== DharmaAI Compliance Agent Run Started ===")
 
+    # 0) Re-screen history if the PEP/OFAC lists gained entries. This runs
+    #    before this run's files are indexed, so they are screened once, live.
+    from rescreen import get_history_index, rescreen_changed_lists, save_snapshots
+
+    history = get_history_index()
+    history.sync(PROCESSED_DIR)
+    retro, snapshots = rescreen_changed_lists(history)
+    if retro:
+        logging.info(f"Retroactive screening yielded {len(retro)} alerts")
+
     # 1) Fetch or generate transactions
-    txs = fetch_latest_transactions()
+    txs, files = fetch_latest_transactions()
     logging.info(f"Loaded {len(txs)} transactions")
 
     # 2) Run compliance engine
@@ -106,13 +159,33 @@ def main():
         sof_threshold=SOF_AMOUNT_THRESHOLD,
         velocity_threshold=VELOCITY_TXN_THRESHOLD_DEFAULT,
         velocity_window_minutes=VELOCITY_WINDOW_MINUTES_DEFAULT,
-        geojump_window_minutes=GEOJUMP_WINDOW_MINUTES_DEFAULT
+        geojump_window_minutes=GEOJUMP_WINDOW_MINUTES_DEFAULT,
+        workers=COMPLIANCE_WORKERS_DEFAULT,
+        approximate=SKETCH_MODE_DEFAULT
     )
     logging.info(f"Compliance checks yielded {len(alerts)} alerts")
 
-    # 3) Send notifications if any
+    # 2b) Add history matches for newly listed PEP/OFAC entries
+    if retro:
+        alerts.extend(retro)
+
+    # 3) Send notifications if any, highest-risk entities first, and
+    #    export them for case management
     if alerts:
-        send_alerts(alerts)
+        from triage import triage_alerts, prioritize
+        ranked = triage_alerts(txs, alerts)
+        for entry in ranked[:5]:
+            logging.info(f"Top risk: {entry['entity']} score={entry['score']} "
+                         f"alerts={len(entry['alerts'])}")
+        send_alerts(prioritize(alerts, ranked))
+        export_run_alerts(alerts)
+
+    # 3b) Only a run that got this far marks its input as ingested and moves
+    #     the list baselines forward, so a failure above repeats both next run
+    if files:
+        get_seen_store().record(txs)
+        archive_files(files)
+    save_snapshots(snapshots)
 
     # 4) Adjust thresholds based on alert outcomes
     adjust_thresholds(alerts)
@@ -12,17 +12,27 @@ from config import (
     VELOCITY_WINDOW_MINUTES_DEFAULT,
     GEOJUMP_WINDOW_MINUTES_DEFAULT
 )
-from data_loader import load_structured, parse_unstructured
+from data_loader import (
+    load_structured,
+    parse_unstructured,
+    filter_from_date,
+    load_pep_list,
+    load_ofac_list
+)
 from generators import build_customer_map, gen_transaction
 from engine import run_compliance
+from dedup import get_seen_store
+from export import EXPORT_FORMATS
 from ui import (
     configure_page,
     sidebar_settings,
     show_metrics,
     show_chart,
+    show_top_entities,
     show_table_and_download
 )
-from rules import RULE_META
+from triage import triage_alerts
+from rules import RULE_META, required_columns
 
 def main():
     configure_page()
@@ -43,12 +53,15 @@ def main():
         sof_threshold,
         velocity_threshold,
         velocity_window_minutes,
-        geojump_window_minutes
+        geojump_window_minutes,
+        skip_seen,
+        export_format
     ) = sidebar_settings(
         RULE_META,
         STRUCTURED_EXT,
         UNSTRUCTURED_EXT,
         DATE_FILTER_DEFAULT,
+        EXPORT_FORMATS,
         CTR_THRESHOLD_DEFAULT,
         EXPOSURE_THRESHOLD_DEFAULT,
         SAR_TXN_COUNT_THRESHOLD_DEFAULT,
@@ -62,16 +75,37 @@ def main():
         if uploaded_file:
             ext = uploaded_file.name.lower().split('.')[-1]
             if ext in STRUCTURED_EXT:
-                txs = load_structured(uploaded_file, ext)
+                txs = load_structured(
+                    uploaded_file,
+                    ext,
+                    columns=required_columns(selected_rules),
+                    date_from=date_filter
+                )
             else:
                 txs = parse_unstructured(uploaded_file)
                 if not txs:
                     st.error("No transactions parsed from unstructured file.")
                     return
+                # Same From Date cut as the structured loaders apply
+                txs = filter_from_date(txs, date_filter)
+            if skip_seen:
+                # Preview only: the UI never records tx_ids, so re-running an
+                # upload or screening a file before the agent does is safe
+                txs = get_seen_store().filter_new(txs)
+                if not txs:
+                    st.warning("All transactions in this file were already ingested.")
+                    return
         else:
             cust_map = build_customer_map()
             txs = [gen_transaction(cust_map) for _ in range(200)]
 
+        # The loaders only log failures; tell the analyst instead of quietly
+        # screening against an empty list (run_compliance reuses the cache)
+        if enable_pep and not load_pep_list():
+            st.warning("Could not load the PEP list; PEP screening is skipped for this run.")
+        if enable_ofac and not load_ofac_list():
+            st.warning("Could not load the OFAC list; OFAC screening is skipped for this run.")
+
         raw_alerts = run_compliance(
             txs,
             ctr_threshold,
@@ -119,7 +153,12 @@ def main():
 
         show_metrics(txs, filtered)
         show_chart(filtered)
-        show_table_and_download(filtered)
+        show_top_entities(triage_alerts(
+            txs,
+            [(r["rule"], r["entity"], r["detail"]) for r in filtered],
+            tx_index=tx_map
+        ))
+        show_table_and_download(filtered, export_format)
 
 if __name__ == "__main__":
     main()
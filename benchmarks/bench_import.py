@@ -0,0 +1,54 @@
+# benchmarks/bench_import.py - import-time guard for the headless core
+#
+#   python -m benchmarks.bench_import [--budget-ms 50]
+#
+# Exits non-zero if a core module pulls in a UI/heavy dependency at import
+# time or the median cold import exceeds the budget.
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+CORE_MODULES = ["config", "rules", "data_loader", "engine", "dedup", "agent"]
+HEAVY_MODULES = ["streamlit", "pandas", "requests", "pyarrow", "altair", "networkx", "faker"]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+heavy = sorted(m for m in {heavy!r} if m in sys.modules)
+print(json.dumps({{"ms": elapsed * 1000, "heavy": heavy}}))
+"""
+
+def probe(module):
+    code = PROBE.format(module=module, heavy=HEAVY_MODULES)
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(out)
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless core import-time guard")
+    parser.add_argument("--budget-ms", type=float, default=50.0)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'module':<12} {'median ms':>10}  heavy imports")
+    for module in CORE_MODULES:
+        runs = [probe(module) for _ in range(args.repeat)]
+        median = statistics.median(r["ms"] for r in runs)
+        heavy = runs[0]["heavy"]
+        over = median > args.budget_ms
+        failed |= over or bool(heavy)
+        flag = "  OVER BUDGET" if over else ""
+        print(f"{module:<12} {median:>10.1f}  {', '.join(heavy) or '-'}{flag}")
+
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
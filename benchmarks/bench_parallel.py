@@ -0,0 +1,66 @@
+# benchmarks/bench_parallel.py - scaling of customer-partitioned execution
+#
+#   python -m benchmarks.bench_parallel --count 100000 --workers 1 2 4 8
+
+import argparse
+import os
+import time
+
+from config import (
+    CTR_THRESHOLD_DEFAULT,
+    EXPOSURE_THRESHOLD_DEFAULT,
+    SAR_TXN_COUNT_THRESHOLD_DEFAULT,
+    MIN_RETENTION_YEARS_DEFAULT,
+    REQUIRE_SOF_FOR_CASH,
+    SOF_AMOUNT_THRESHOLD,
+    VELOCITY_TXN_THRESHOLD_DEFAULT,
+    VELOCITY_WINDOW_MINUTES_DEFAULT,
+    GEOJUMP_WINDOW_MINUTES_DEFAULT
+)
+from engine import run_compliance
+from generators import build_customer_map, gen_transaction
+
+def run(txs, workers):
+    return run_compliance(
+        txs,
+        ctr_threshold=CTR_THRESHOLD_DEFAULT,
+        exposure_threshold=EXPOSURE_THRESHOLD_DEFAULT,
+        sar_threshold=SAR_TXN_COUNT_THRESHOLD_DEFAULT,
+        min_retention_years=MIN_RETENTION_YEARS_DEFAULT,
+        enable_pep=False,
+        enable_ofac=False,
+        ownership_file=None,
+        require_sof=REQUIRE_SOF_FOR_CASH,
+        sof_threshold=SOF_AMOUNT_THRESHOLD,
+        velocity_threshold=VELOCITY_TXN_THRESHOLD_DEFAULT,
+        velocity_window_minutes=VELOCITY_WINDOW_MINUTES_DEFAULT,
+        geojump_window_minutes=GEOJUMP_WINDOW_MINUTES_DEFAULT,
+        workers=workers
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Customer-partitioned scaling benchmark")
+    parser.add_argument("--count", type=int, default=50_000)
+    parser.add_argument("--customers", type=int, default=5_000)
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    args = parser.parse_args()
+
+    customer_map = build_customer_map(args.customers)
+    txs = [gen_transaction(customer_map) for _ in range(args.count)]
+
+    baseline = None
+    reference = None
+    print(f"{'workers':>8} {'seconds':>9} {'tx/s':>11} {'speedup':>8}")
+    for workers in args.workers:
+        start = time.perf_counter()
+        alerts = run(txs, workers)
+        elapsed = time.perf_counter() - start
+        if reference is None:
+            baseline, reference = elapsed, alerts
+        elif alerts != reference:
+            raise SystemExit(f"workers={workers}: alerts differ from workers={args.workers[0]}")
+        print(f"{workers:>8} {elapsed:>9.3f} {len(txs) / elapsed:>11,.0f} {baseline / elapsed:>8.2f}")
+
+if __name__ == "__main__":
+    main()
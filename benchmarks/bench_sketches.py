@@ -0,0 +1,85 @@
+# benchmarks/bench_sketches.py - exact vs sketch-backed SAR/exposure aggregation
+#
+#   python -m benchmarks.bench_sketches --count 500000 --customers 200000
+#
+# Compares the sketch path against exact per-customer aggregation: reported
+# alerts must be a subset of the exact ones (totals are recounted exactly),
+# and recall shows what the configured error bounds cost. Exits non-zero on
+# any alert the exact path would not raise.
+
+import argparse
+import random
+import time
+
+from config import (
+    SAR_TXN_COUNT_THRESHOLD_DEFAULT,
+    EXPOSURE_THRESHOLD_DEFAULT,
+    SKETCH_DELTA,
+    SKETCH_TOP_K
+)
+from rules import evaluate_sar_batch
+from sketches import CountMinSketch, heavy_hitters
+
+def synthetic(count, customers, heavy):
+    """Mostly low-activity customers plus a few heavy hitters."""
+    rng = random.Random(42)
+    hot = [f"HOT-{i}" for i in range(heavy)]
+    txs = []
+    for i in range(count):
+        cid = rng.choice(hot) if rng.random() < 0.05 else f"C-{rng.randrange(customers)}"
+        txs.append({
+            "tx_id": f"T-{i}",
+            "amount": round(rng.uniform(-50, 5_000), 2),
+            "customer_id": cid
+        })
+    return txs
+
+def exact_totals(txs, value=None):
+    totals = {}
+    for tx in txs:
+        cid = tx.get("customer_id")
+        totals[cid] = totals.get(cid, 0) + (1 if value is None else tx.get(value, 0))
+    return totals
+
+def main():
+    parser = argparse.ArgumentParser(description="Exact vs sketch aggregation")
+    parser.add_argument("--count", type=int, default=200_000)
+    parser.add_argument("--customers", type=int, default=100_000)
+    parser.add_argument("--heavy", type=int, default=50)
+    parser.add_argument("--epsilon", type=float, nargs="+", default=[1e-3, 1e-4, 1e-5])
+    parser.add_argument("--top-k", type=int, default=SKETCH_TOP_K)
+    args = parser.parse_args()
+
+    txs = synthetic(args.count, args.customers, args.heavy)
+
+    # Rule-level check at the configured defaults
+    exact = evaluate_sar_batch(txs)
+    approx = evaluate_sar_batch(txs, approximate=True)
+    print(f"evaluate_sar_batch: exact {len(exact)} alerts, sketch {len(approx)} alerts")
+    failed = not set(approx) <= set(exact)
+
+    cases = [
+        ("SAR", None, SAR_TXN_COUNT_THRESHOLD_DEFAULT),
+        ("Exposure", "amount", EXPOSURE_THRESHOLD_DEFAULT),
+    ]
+    print(f"{'rule':<9} {'epsilon':>8} {'sketch KiB':>10} {'exact keys':>10} "
+          f"{'alerts':>7} {'recall':>7} {'evicted':>8} {'seconds':>8}")
+    for name, value, threshold in cases:
+        truth = {k: v for k, v in exact_totals(txs, value).items() if v > threshold}
+        for eps in args.epsilon:
+            start = time.perf_counter()
+            totals, overflow = heavy_hitters(txs, "customer_id", threshold, value=value,
+                                             epsilon=eps, top_k=args.top_k)
+            elapsed = time.perf_counter() - start
+            found = {k: v for k, v in totals.items() if v > threshold}
+            false_pos = set(found) - set(truth)
+            failed |= bool(false_pos) or any(found[k] != truth[k] for k in found if k in truth)
+            recall = len(found) / len(truth) if truth else 1.0
+            kib = CountMinSketch(eps, SKETCH_DELTA).nbytes() / 1024
+            print(f"{name:<9} {eps:>8.0e} {kib:>10.0f} {len(exact_totals(txs, value)):>10} "
+                  f"{len(found):>7} {recall:>7.1%} {overflow[0] if overflow else 0:>8} {elapsed:>8.2f}")
+    if failed:
+        raise SystemExit("sketch path reported alerts the exact path does not")
+
+if __name__ == "__main__":
+    main()
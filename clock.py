@@ -0,0 +1,27 @@
+# clock.py - injectable time source for the engine
+
+from datetime import datetime, timezone
+
+class SystemClock:
+    """Wall-clock UTC time; what live runs use."""
+
+    def now(self):
+        return datetime.now(timezone.utc)
+
+class SimulatedClock:
+    """
+    Clock driven by the data being replayed. It only moves forward, so
+    out-of-order input cannot rewind time.
+    """
+
+    def __init__(self, start=None):
+        self._now = start or datetime.min.replace(tzinfo=timezone.utc)
+
+    def now(self):
+        return self._now
+
+    def advance_to(self, moment):
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        if moment > self._now:
+            self._now = moment
@@ -11,8 +11,49 @@ VELOCITY_TXN_THRESHOLD_DEFAULT   = 10   # M transactions
 VELOCITY_WINDOW_MINUTES_DEFAULT  = 60   # N minutes
 GEOJUMP_WINDOW_MINUTES_DEFAULT   = 120  # T minutes
 
+# Structuring: repeated cash deposits under the CTR threshold that add up to
+# more than it. MIN_TXNS * (1 - MARGIN) stays below 1 so the sum check
+# matters (three deposits of 3,000 do not cross a 10,000 CTR).
+STRUCTURING_WINDOWS_MINUTES      = (60, 24 * 60, 7 * 24 * 60)  # 1h, 24h, 7d
+STRUCTURING_MARGIN               = 0.70  # qualifying = within 70% of CTR
+STRUCTURING_MIN_TXNS             = 3
+STRUCTURING_PURPOSE_CODE         = "CASH"  # deposits counted towards a burst
+
+# Execution defaults
+COMPLIANCE_WORKERS_DEFAULT       = 1    # >1 partitions by customer across processes
+
+# Ingest deduplication (persistent tx_id seen-set)
+DEDUP_DIR                 = "data/dedup"
+DEDUP_RETENTION_DAYS      = 30
+DEDUP_BUCKET_DAYS         = 7          # ingest days per Bloom filter
+DEDUP_EXPECTED_PER_DAY    = 1_000_000
+DEDUP_FALSE_POSITIVE_RATE = 0.001
+
+# Approximate (sketch-backed) SAR/exposure aggregation; exact is the default
+SKETCH_MODE_DEFAULT       = False
+SKETCH_EPSILON            = 1e-4   # overcount <= epsilon * total, w.p. 1 - delta
+SKETCH_DELTA              = 0.01
+SKETCH_TOP_K              = 10_000 # heavy-hitter candidates recounted exactly
+
+# Replay / backtest checkpoints
+REPLAY_DIR                = "data/replay"
+
+# Alert export
+EXPORT_DIR                = "data/exports"
+EXPORT_FORMAT_DEFAULT     = "csv.gz"   # csv | csv.gz | parquet
+EXPORT_CHUNK_SIZE         = 10_000     # rows buffered per write
+
+# Alert triage
+TRIAGE_TOP_K              = 50         # highest-risk entities surfaced per run
+
+# Retroactive list re-screening
+HISTORY_INDEX_PATH        = "data/index/history.sqlite"
+LIST_SNAPSHOT_DIR         = "data/lists"
+RESCREEN_LOOKBACK_DAYS    = 365        # None re-screens all indexed history
+
 # Supported file extensions
-STRUCTURED_EXT    = {'csv', 'json', 'xlsx'}
+COLUMNAR_EXT      = {'parquet', 'arrow', 'feather'}
+STRUCTURED_EXT    = {'csv', 'json', 'xlsx'}.union(COLUMNAR_EXT)
 UNSTRUCTURED_EXT  = {'txt'}
 ALL_EXTENSIONS    = STRUCTURED_EXT.union(UNSTRUCTURED_EXT)
 
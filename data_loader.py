@@ -1,11 +1,16 @@
-import pandas as pd
-import requests
 import io
+import os
 import re
 import csv
-import streamlit as st
+import json
+import time as _time
+import logging
+import functools
+import threading
+from datetime import datetime, time, timezone
 
 from config import (
+    COLUMNAR_EXT,
     STRUCTURED_EXT,
     UNSTRUCTURED_EXT,
     UNSTRUCTURED_PATTERN,
@@ -17,14 +22,135 @@ from config import (
     LIST_CACHE_TTL
 )
 
-def load_structured(uploaded_file, ext):
+# pandas, requests and pyarrow are imported inside the loaders that need them
+# so the headless engine imports in milliseconds.
+
+def _ttl_cache(ttl=None):
+    """
+    Memoize a loader by its arguments, optionally expiring after `ttl`
+    seconds. Works with or without a Streamlit runtime.
+    """
+    def decorator(fn):
+        cache = {}
+        lock = threading.Lock()
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = (args, tuple(sorted(kwargs.items())))
+            now = _time.monotonic()
+            with lock:
+                hit = cache.get(key)
+            if hit and (ttl is None or now - hit[0] < ttl):
+                return hit[1]
+            value = fn(*args, **kwargs)
+            with lock:
+                cache[key] = (now, value)
+            return value
+
+        wrapper.clear = cache.clear
+        return wrapper
+    return decorator
+
+def _date_key(value):
+    # ISO-8601 text as the columnar filter compares it; aware datetimes in UTC
+    if value != value:  # NaN / NaT
+        return None
+    if isinstance(value, str):
+        return value
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        return value.isoformat()
+    return None
+
+def filter_from_date(txs, date_from):
+    """
+    Rows dated on or after `date_from`, with the same semantics as the
+    Parquet/Arrow pushdown: rows without a timestamp are dropped.
+    """
+    bound = date_from.isoformat()
+    return [tx for tx in txs if (key := _date_key(tx.get('timestamp'))) is not None and key >= bound]
+
+def load_structured(uploaded_file, ext, columns=None, date_from=None):
+    """
+    Load a structured file into a list of transaction dicts.
+    `columns` restricts the fields read; `date_from` drops rows older than
+    that date for every format (pushed down to row groups for Parquet/Arrow).
+    Dropped rows are not seen by the batch rules either, so SAR counts,
+    exposure sums and windows only cover rows on or after `date_from`.
+    """
+    if ext in COLUMNAR_EXT:
+        return load_columnar(uploaded_file, ext, columns, date_from)
+    import pandas as pd
     if ext == 'csv':
-        df = pd.read_csv(uploaded_file)
+        wanted = set(columns) if columns else None
+        df = pd.read_csv(uploaded_file, usecols=(lambda c: c in wanted) if wanted else None)
     elif ext == 'json':
         df = pd.read_json(uploaded_file)
     else:  # xlsx
         df = pd.read_excel(uploaded_file)
-    return df.to_dict(orient='records')
+    txs = df.to_dict(orient='records')
+    return filter_from_date(txs, date_from) if date_from else txs
+
+def _timestamp_bound(field_type, date_from):
+    import pyarrow as pa
+    if pa.types.is_timestamp(field_type):
+        return datetime.combine(date_from, time(), tzinfo=timezone.utc if field_type.tz else None)
+    if pa.types.is_date(field_type):
+        return date_from
+    # ISO-8601 strings order lexicographically
+    return date_from.isoformat()
+
+def load_columnar(source, ext, columns=None, date_from=None):
+    """
+    Read Parquet or Arrow IPC (Feather v2) with column projection.
+    Paths are memory-mapped instead of copied into process memory, and the
+    `date_from` predicate is evaluated against Parquet row-group statistics
+    so non-matching row groups are never decoded.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+
+    is_path = isinstance(source, (str, os.PathLike))
+
+    if ext == 'parquet':
+        schema = pq.read_schema(source, memory_map=is_path)
+        if not is_path:
+            source.seek(0)
+        cols = [c for c in columns if c in schema.names] if columns else None
+        filters = None
+        if date_from and 'timestamp' in schema.names:
+            bound = _timestamp_bound(schema.field('timestamp').type, date_from)
+            filters = [('timestamp', '>=', bound)]
+        table = pq.read_table(source, columns=cols, filters=filters, memory_map=is_path)
+    else:  # arrow / feather (IPC file format)
+        src = pa.memory_map(os.fspath(source), 'r') if is_path else pa.BufferReader(source.read())
+        table = ipc.open_file(src).read_all()
+        if columns:
+            table = table.select([c for c in columns if c in table.schema.names])
+        if date_from and 'timestamp' in table.schema.names:
+            bound = _timestamp_bound(table.schema.field('timestamp').type, date_from)
+            table = table.filter(pc.greater_equal(table['timestamp'], pa.scalar(bound)))
+
+    # Rules parse timestamps with datetime.fromisoformat, so hand them strings
+    if 'timestamp' in table.schema.names:
+        ts_type = table.schema.field('timestamp').type
+        if pa.types.is_timestamp(ts_type) or pa.types.is_date(ts_type):
+            idx = table.schema.get_field_index('timestamp')
+            column = table['timestamp']
+            if pa.types.is_date(ts_type):
+                fmt = '%Y-%m-%d'
+            elif ts_type.tz:
+                # strftime renders wall time in the column's zone and drops the
+                # offset; normalise to UTC and keep the offset in the string
+                column = column.cast(pa.timestamp(ts_type.unit, tz='UTC'))
+                fmt = '%Y-%m-%dT%H:%M:%S+00:00'
+            else:
+                fmt = '%Y-%m-%dT%H:%M:%S'
+            table = table.set_column(idx, 'timestamp', pc.strftime(column, format=fmt))
+    return table.to_pylist()
 
 def parse_unstructured(uploaded_file):
     name = uploaded_file.name.lower()
@@ -49,8 +175,24 @@ def parse_unstructured(uploaded_file):
         })
     return txs
 
-@st.cache_data(ttl=LIST_CACHE_TTL)
+def _pep_ids(df):
+    for column in ('id', 'customer_id'):
+        if column in df.columns:
+            return set(df[column].astype(str).dropna())
+    return set()
+
+def _ofac_ids(df):
+    ids = set()
+    if 'account' in df.columns:
+        ids |= set(df['account'].astype(str).dropna())
+    if 'entity_name' in df.columns:
+        ids |= set(df['entity_name'].astype(str).dropna())
+    return ids
+
+@_ttl_cache(ttl=LIST_CACHE_TTL)
 def load_pep_list():
+    import pandas as pd
+    import requests
     try:
         resp = requests.get(PEP_LIST_URL, timeout=10)
         resp.raise_for_status()
@@ -64,11 +206,13 @@ def load_pep_list():
             df = pd.read_csv(PEP_LIST_LOCAL)
             return set(df['customer_id'].astype(str).dropna())
         except Exception:
-            st.warning("Could not load PEP list.")
+            logging.warning("Could not load PEP list.")
             return set()
 
-@st.cache_data(ttl=LIST_CACHE_TTL)
+@_ttl_cache(ttl=LIST_CACHE_TTL)
 def load_ofac_list():
+    import pandas as pd
+    import requests
     try:
         resp = requests.get(OFAC_LIST_URL, timeout=10)
         resp.raise_for_status()
@@ -77,16 +221,23 @@ def load_ofac_list():
         try:
             df = pd.read_csv(OFAC_LIST_LOCAL)
         except Exception:
-            st.warning("Could not load OFAC list.")
+            logging.warning("Could not load OFAC list.")
             return set()
-    ids = set()
-    if 'account' in df.columns:
-        ids |= set(df['account'].astype(str).dropna())
-    if 'entity_name' in df.columns:
-        ids |= set(df['entity_name'].astype(str).dropna())
-    return ids
+    return _ofac_ids(df)
+
+def load_list_file(path, kind):
+    """
+    Read a pinned PEP or OFAC list (`kind` "pep" / "ofac") from a CSV in the
+    published layout or a JSON snapshot as written by rescreen.py.
+    """
+    if str(path).lower().endswith('.json'):
+        with open(path) as f:
+            return set(json.load(f))
+    import pandas as pd
+    df = pd.read_csv(path)
+    return _pep_ids(df) if kind == 'pep' else _ofac_ids(df)
 
-@st.cache_data
+@_ttl_cache()
 def load_ownership_graph(path=OWNERSHIP_GRAPH_LOCAL):
     graph = {}
     try:
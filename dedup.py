@@ -0,0 +1,215 @@
+# dedup.py - persistent seen-set for cross-file / cross-run tx_id deduplication
+
+import hashlib
+import logging
+import math
+import sqlite3
+import struct
+import threading
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+from config import (
+    DEDUP_DIR,
+    DEDUP_RETENTION_DAYS,
+    DEDUP_BUCKET_DAYS,
+    DEDUP_EXPECTED_PER_DAY,
+    DEDUP_FALSE_POSITIVE_RATE
+)
+
+_HEADER = struct.Struct("<QI")  # bit count, hash count
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter using Kirsch-Mitzenmacher double hashing over a
+    single blake2b digest.
+    """
+
+    def __init__(self, capacity, error_rate, bits=None, hashes=None, data=None):
+        self.bits = bits or max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = hashes or max(1, round(self.bits / capacity * math.log(2)))
+        self.data = data if data is not None else bytearray((self.bits + 7) // 8)
+
+    @staticmethod
+    def key_hash(key):
+        """(h1, h2) for double hashing; compute once and probe every filter."""
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+
+    def positions(self, key_hash):
+        h1, h2 = key_hash
+        bits = self.bits
+        return [(h1 + i * h2) % bits for i in range(self.hashes)]
+
+    def add(self, key, key_hash=None):
+        data = self.data
+        for pos in self.positions(key_hash or self.key_hash(key)):
+            data[pos >> 3] |= 1 << (pos & 7)
+
+    def has_positions(self, positions):
+        data = self.data
+        for pos in positions:
+            if not data[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def __contains__(self, key):
+        return self.has_positions(self.positions(self.key_hash(key)))
+
+    def to_bytes(self):
+        return _HEADER.pack(self.bits, self.hashes) + bytes(self.data)
+
+    @classmethod
+    def from_bytes(cls, raw):
+        bits, hashes = _HEADER.unpack_from(raw)
+        return cls(None, None, bits, hashes, bytearray(raw[_HEADER.size:]))
+
+class SeenTxStore:
+    """
+    Persistent set of ingested tx_ids with time-based expiry.
+
+    One Bloom filter per `bucket_days` of ingest answers "definitely new" in
+    memory; a positive is confirmed against an on-disk SQLite table, so false
+    positives never drop a transaction and RAM stays bounded by the filters.
+    IDs older than `retention_days` are dropped from SQLite, and a filter
+    once its whole bucket is past the cutoff. Few, larger filters keep the
+    per-key probe cost low.
+    """
+
+    def __init__(
+        self,
+        path=DEDUP_DIR,
+        retention_days=DEDUP_RETENTION_DAYS,
+        bucket_days=DEDUP_BUCKET_DAYS,
+        expected_per_day=DEDUP_EXPECTED_PER_DAY,
+        error_rate=DEDUP_FALSE_POSITIVE_RATE
+    ):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.retention_days = retention_days
+        self.bucket_days = bucket_days
+        self.expected_per_day = expected_per_day
+        self.error_rate = error_rate
+        self._lock = threading.Lock()
+        self._dirty = set()
+        self._db = sqlite3.connect(self.path / "seen.sqlite", check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS seen (tx_id TEXT PRIMARY KEY, day TEXT NOT NULL) WITHOUT ROWID"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS seen_day ON seen(day)")
+        self._db.commit()
+        self._blooms = {}
+        for f in self.path.glob("bloom-*.bin"):
+            self._blooms[f.stem[len("bloom-"):]] = BloomFilter.from_bytes(f.read_bytes())
+
+    def _bucket_of(self, day):
+        ordinal = day.toordinal()
+        return date.fromordinal(ordinal - ordinal % self.bucket_days).isoformat()
+
+    def _bloom_for(self, bucket):
+        bloom = self._blooms.get(bucket)
+        if bloom is None:
+            bloom = self._blooms[bucket] = BloomFilter(
+                self.expected_per_day * self.bucket_days, self.error_rate
+            )
+        return bloom
+
+    def expire(self, now=None):
+        now = now or datetime.now(timezone.utc)
+        cutoff = (now - timedelta(days=self.retention_days)).date()
+        span = timedelta(days=self.bucket_days)
+        for bucket in [b for b in self._blooms if date.fromisoformat(b) + span <= cutoff]:
+            del self._blooms[bucket]
+            self._dirty.discard(bucket)
+            (self.path / f"bloom-{bucket}.bin").unlink(missing_ok=True)
+        self._db.execute("DELETE FROM seen WHERE day < ?", (cutoff.isoformat(),))
+        self._db.commit()
+
+    def _seen(self, tx_id, key_hash):
+        # Filters built with the same sizing share bit positions, so they are
+        # computed once per key and probed inline across all retained days
+        groups = {}
+        for bloom in self._blooms.values():
+            groups.setdefault((bloom.bits, bloom.hashes), (bloom, []))[1].append(bloom.data)
+        for bloom, datas in groups.values():
+            masks = [(pos >> 3, 1 << (pos & 7)) for pos in bloom.positions(key_hash)]
+            for data in datas:
+                for byte, bit in masks:
+                    if not data[byte] & bit:
+                        break
+                else:
+                    return self._db.execute(
+                        "SELECT 1 FROM seen WHERE tx_id = ?", (tx_id,)
+                    ).fetchone() is not None
+        return False
+
+    @staticmethod
+    def _tx_key(tx):
+        tx_id = tx.get("tx_id")
+        if tx_id is None or tx_id != tx_id or tx_id == "":  # None / NaN / blank
+            return None
+        return str(tx_id)
+
+    def filter_new(self, txs, now=None):
+        """
+        Return the transactions whose tx_id has not been recorded within the
+        retention window (or earlier in `txs`). Nothing is recorded here, so
+        a preview or a failed run leaves the store untouched; call record()
+        once the transactions have been screened. Rows without a tx_id are
+        passed through untouched.
+        """
+        with self._lock:
+            self.expire(now)
+            fresh, batch = [], set()
+            for tx in txs:
+                tx_id = self._tx_key(tx)
+                if tx_id is None:
+                    fresh.append(tx)
+                    continue
+                if tx_id in batch:
+                    continue
+                if self._seen(tx_id, BloomFilter.key_hash(tx_id)):
+                    continue
+                batch.add(tx_id)
+                fresh.append(tx)
+        dropped = len(txs) - len(fresh)
+        if dropped:
+            logging.info(f"Dedup: dropped {dropped} previously seen transactions")
+        return fresh
+
+    def record(self, txs, now=None):
+        """Record the tx_ids of screened transactions as seen."""
+        now = now or datetime.now(timezone.utc)
+        today = now.date().isoformat()
+        bucket = self._bucket_of(now.date())
+        with self._lock:
+            self.expire(now)
+            bloom = self._bloom_for(bucket)
+            new_ids = []
+            for tx in txs:
+                tx_id = self._tx_key(tx)
+                if tx_id is None:
+                    continue
+                bloom.add(tx_id, BloomFilter.key_hash(tx_id))
+                new_ids.append((tx_id, today))
+            if new_ids:
+                self._db.executemany("INSERT OR IGNORE INTO seen VALUES (?, ?)", new_ids)
+                self._db.commit()
+                self._dirty.add(bucket)
+            self._flush()
+
+    def _flush(self):
+        for bucket in self._dirty:
+            tmp = self.path / f"bloom-{bucket}.bin.tmp"
+            tmp.write_bytes(self._blooms[bucket].to_bytes())
+            tmp.replace(self.path / f"bloom-{bucket}.bin")
+        self._dirty.clear()
+
+_STORE = None
+
+def get_seen_store():
+    """Process-wide store, so Streamlit reruns reuse the loaded filters."""
+    global _STORE
+    if _STORE is None:
+        _STORE = SeenTxStore()
+    return _STORE
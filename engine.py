@@ -4,18 +4,74 @@ from data_loader import (
     load_ownership_graph
 )
 from rules import (
-    evaluate_aml_rules,
-    evaluate_pep_rule,
-    evaluate_ofac_rule,
-    evaluate_edd_hierarchy,
-    evaluate_edd_sof,
+    RULE_META,
     evaluate_sar_batch,
     evaluate_bcbs239_batch,
-    evaluate_gdpr_rules,
-    evaluate_sox_rules,
     evaluate_velocity_batch,
+    evaluate_structuring_batch,
     evaluate_geo_jump_batch
 )
+from compiler import compile_evaluator
+from clock import SystemClock
+
+# Rule rank used to give alerts a deterministic order
+_RULE_ORDER = {rule: i for i, rule in enumerate(RULE_META)}
+
+def sort_alerts(alerts):
+    """
+    Deterministic alert order (rule, entity, detail), independent of how the
+    transactions were partitioned.
+    """
+    return sorted(
+        alerts,
+        key=lambda a: (_RULE_ORDER.get(a[0], len(_RULE_ORDER)), a[0], str(a[1]), str(a[2]))
+    )
+
+def evaluate_transactions(
+    txs,
+    pep_list,
+    ofac_list,
+    graph,
+    ctr_threshold,
+    exposure_threshold,
+    sar_threshold,
+    min_retention_years,
+    enable_pep,
+    enable_ofac,
+    require_sof,
+    sof_threshold,
+    velocity_threshold,
+    velocity_window_minutes,
+    geojump_window_minutes,
+    approximate=False,
+    now=None
+):
+    # Per-transaction rules run in a single fused pass (see compiler.py);
+    # GDPR/SOX alerts are collected separately to keep the report order.
+    evaluate = compile_evaluator(
+        ctr_threshold,
+        min_retention_years,
+        enable_pep,
+        enable_ofac,
+        require_sof,
+        sof_threshold,
+        pep_list,
+        ofac_list,
+        graph
+    )
+    alerts, tail = [], []
+    emit, emit_tail = alerts.append, tail.append
+    for tx in txs:
+        evaluate(tx, emit, emit_tail)
+
+    alerts.extend(evaluate_velocity_batch(txs, velocity_threshold, velocity_window_minutes))
+    alerts.extend(evaluate_structuring_batch(txs, ctr_threshold))
+    alerts.extend(evaluate_geo_jump_batch(txs, geojump_window_minutes))
+    alerts.extend(evaluate_sar_batch(txs, sar_threshold, approximate))
+    alerts.extend(evaluate_bcbs239_batch(txs, exposure_threshold, approximate, now))
+    alerts.extend(tail)
+
+    return alerts
 
 def run_compliance(
     txs,
@@ -30,29 +86,52 @@ def run_compliance(
     sof_threshold,
     velocity_threshold,
     velocity_window_minutes,
-    geojump_window_minutes
+    geojump_window_minutes,
+    workers=1,
+    approximate=False,
+    clock=None,
+    pep_list=None,
+    ofac_list=None,
+    graph=None
 ):
-    pep_list  = load_pep_list() if enable_pep else set()
-    ofac_list = load_ofac_list() if enable_ofac else set()
+    # Lists and graph may be pinned by the caller (e.g. a replay); otherwise
+    # the current ones are loaded
+    if not enable_pep:
+        pep_list = set()
+    elif pep_list is None:
+        pep_list = load_pep_list()
+    if not enable_ofac:
+        ofac_list = set()
+    elif ofac_list is None:
+        ofac_list = load_ofac_list()
 
     # Load ownership graph (writes uploaded file if provided)
-    graph = load_ownership_graph()
+    if graph is None:
+        graph = load_ownership_graph()
 
-    alerts = []
-    for tx in txs:
-        alerts.extend(evaluate_aml_rules(tx, ctr_threshold))
-        alerts.extend(evaluate_pep_rule(tx, pep_list, enable_pep))
-        alerts.extend(evaluate_ofac_rule(tx, ofac_list, enable_ofac))
-        alerts.extend(evaluate_edd_hierarchy(tx, graph))
-        alerts.extend(evaluate_edd_sof(tx, require_sof, sof_threshold))
-
-    alerts.extend(evaluate_velocity_batch(txs, velocity_threshold, velocity_window_minutes))
-    alerts.extend(evaluate_geo_jump_batch(txs, geojump_window_minutes))
-    alerts.extend(evaluate_sar_batch(txs, sar_threshold))
-    alerts.extend(evaluate_bcbs239_batch(txs, exposure_threshold))
+    params = dict(
+        ctr_threshold=ctr_threshold,
+        exposure_threshold=exposure_threshold,
+        sar_threshold=sar_threshold,
+        min_retention_years=min_retention_years,
+        enable_pep=enable_pep,
+        enable_ofac=enable_ofac,
+        require_sof=require_sof,
+        sof_threshold=sof_threshold,
+        velocity_threshold=velocity_threshold,
+        velocity_window_minutes=velocity_window_minutes,
+        geojump_window_minutes=geojump_window_minutes,
+        approximate=approximate,
+        # Read once so every partition judges staleness against the same instant
+        now=(clock or SystemClock()).now()
+    )
 
-    for tx in txs:
-        alerts.extend(evaluate_gdpr_rules(tx, min_retention_years))
-        alerts.extend(evaluate_sox_rules(tx))
+    if workers > 1:
+        # Imported lazily: parallel.py imports this module
+        from parallel import run_partitioned
+        alerts = run_partitioned(txs, workers, pep_list, ofac_list, graph, params)
+    else:
+        alerts = evaluate_transactions(txs, pep_list, ofac_list, graph, **params)
 
-    return alerts
+    # Same order whatever the worker count
+    return sort_alerts(alerts)
@@ -0,0 +1,103 @@
+# export.py - streaming alert export (CSV, gzip CSV, Parquet)
+
+import os
+from itertools import chain, islice
+
+from rules import RULE_META
+from config import EXPORT_CHUNK_SIZE
+
+# csv, gzip and io are imported inside the writers so the headless agent
+# imports in milliseconds.
+
+# format -> (file suffix, MIME type)
+EXPORT_FORMATS = {
+    "csv":     ("csv",     "text/csv"),
+    "csv.gz":  ("csv.gz",  "application/gzip"),
+    "parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+ALERT_FIELDS = ["rule", "regulation", "description", "entity", "detail"]
+
+def alert_records(alerts):
+    """Lazily turn engine (rule, entity, detail) tuples into export rows."""
+    for rule, entity, detail in alerts:
+        reg_label, reg_desc = RULE_META.get(rule, ("Unknown", ""))
+        yield {
+            "rule":        rule,
+            "regulation":  reg_label,
+            "description": reg_desc,
+            "entity":      entity,
+            "detail":      detail
+        }
+
+def _chunks(records, size):
+    it = iter(records)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+def _write_csv(records, stream, fieldnames, chunk_size):
+    import csv
+    writer = csv.DictWriter(stream, fieldnames=fieldnames, extrasaction="ignore")
+    writer.writeheader()
+    for chunk in _chunks(records, chunk_size):
+        writer.writerows(chunk)
+
+def _write_parquet(records, sink, fieldnames, chunk_size):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    # Details mix numbers and text, so every column is written as string
+    schema = pa.schema([(name, pa.string()) for name in fieldnames])
+    with pq.ParquetWriter(sink, schema) as writer:
+        for chunk in _chunks(records, chunk_size):
+            columns = [
+                [None if r.get(name) is None else str(r.get(name)) for r in chunk]
+                for name in fieldnames
+            ]
+            writer.write_batch(pa.record_batch(columns, schema=schema))
+
+def export_alerts(records, dest, fmt="csv", fieldnames=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Stream alert `records` (dicts, or engine tuples via alert_records) to
+    `dest`, a path or binary file object, `chunk_size` rows at a time. Only
+    one chunk is held in memory regardless of how many alerts there are,
+    as long as `records` is itself lazy (the agent's path; the Streamlit UI
+    holds all alerts anyway). Returns the number of rows written.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    import gzip
+    import io
+
+    it = iter(records)
+    first = next(it, None)
+    if fieldnames is None:
+        fieldnames = list(first) if first is not None else ALERT_FIELDS
+    count = 0
+
+    def counted():
+        nonlocal count
+        for r in (chain([first], it) if first is not None else ()):
+            count += 1
+            yield r
+
+    is_path = isinstance(dest, (str, os.PathLike))
+    if fmt == "parquet":
+        _write_parquet(counted(), os.fspath(dest) if is_path else dest, fieldnames, chunk_size)
+    elif fmt == "csv.gz":
+        raw = gzip.open(dest, "wb") if is_path else gzip.GzipFile(fileobj=dest, mode="wb")
+        # Closing the wrapper finishes the gzip stream but not a caller's file
+        with io.TextIOWrapper(raw, encoding="utf-8", newline="") as stream:
+            _write_csv(counted(), stream, fieldnames, chunk_size)
+    elif is_path:
+        with open(dest, "w", encoding="utf-8", newline="") as stream:
+            _write_csv(counted(), stream, fieldnames, chunk_size)
+    else:
+        stream = io.TextIOWrapper(dest, encoding="utf-8", newline="")
+        _write_csv(counted(), stream, fieldnames, chunk_size)
+        stream.flush()
+        stream.detach()
+    return count
@@ -0,0 +1,178 @@
+# parallel.py - customer-partitioned multi-process rule execution
+
+import marshal
+import pickle
+import zlib
+from array import array
+from operator import itemgetter
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from engine import evaluate_transactions
+
+# Column kinds: fixed-type arrays that workers read straight out of shared
+# memory, NUL-separated UTF-8 text, or a marshal/pickle blob for columns with
+# mixed or non-builtin values
+_FLOAT, _INT, _BOOL, _STR, _MARSHAL, _PICKLE = "f", "i", "b", "s", "m", "p"
+
+# Per-worker state, set once by the pool initializer
+_WORKER_STATE = {}
+
+def partition_of(customer_id, workers):
+    """
+    Stable hash partition for a customer. crc32 rather than hash() because
+    str hashing is salted per process.
+    """
+    return zlib.crc32(str(customer_id).encode("utf-8")) % workers
+
+def partition_transactions(txs, workers):
+    parts = [[] for _ in range(workers)]
+    for tx in txs:
+        parts[partition_of(tx.get("customer_id"), workers)].append(tx)
+    return parts
+
+def _encode_column(values):
+    types = set(map(type, values))
+    if types == {float}:
+        return _FLOAT, [array("d", values).tobytes()]
+    if types == {int}:
+        try:
+            return _INT, [array("q", values).tobytes()]
+        except OverflowError:
+            pass
+    if types == {bool}:
+        return _BOOL, [bytes(values)]
+    if types == {str}:
+        text = "".join(values)
+        # NUL-separated so workers split the column in one C call
+        if "\0" not in text:
+            return _STR, ["\0".join(values).encode("utf-8")]
+    try:
+        return _MARSHAL, [marshal.dumps(values)]
+    except ValueError:
+        return _PICKLE, [pickle.dumps(values, protocol=pickle.HIGHEST_PROTOCOL)]
+
+def encode_partition(txs):
+    """
+    Lay transactions out column by column and return (layout, data).
+    `data` is one buffer holding every column back to back (8-byte aligned);
+    `layout` is (row count, [(name, kind, [(offset, size), ...], mask)]).
+    A column missing from some rows carries a presence mask so decoded rows
+    have exactly the keys they had.
+    """
+    names = list(txs[0]) if txs else []
+    uniform = set(map(len, txs)) <= {len(names)}
+    if uniform:
+        try:
+            # One C-level pass per column; KeyError means the key sets differ
+            values = [list(map(itemgetter(name), txs)) for name in names]
+        except KeyError:
+            uniform = False
+    if not uniform:
+        names = list(dict.fromkeys(k for tx in txs for k in tx))
+        values = ([tx.get(name) for tx in txs] for name in names)
+    chunks, columns, pos = [], [], 0
+
+    def put(raw):
+        nonlocal pos
+        pad = -len(raw) % 8
+        chunks.append(raw + bytes(pad))
+        span = (pos, len(raw))
+        pos += len(raw) + pad
+        return span
+
+    for name, column in zip(names, values):
+        mask = None
+        if not uniform:
+            present = bytes(name in tx for tx in txs)
+            if not all(present):
+                mask = put(present)
+        kind, parts = _encode_column(column)
+        columns.append((name, kind, [put(p) for p in parts], mask))
+    return (len(txs), columns), b"".join(chunks)
+
+def _decode_column(buf, kind, spans):
+    views = [buf[off:off + size] for off, size in spans]
+    try:
+        if kind in (_FLOAT, _INT):
+            with views[0].cast("d" if kind == _FLOAT else "q") as typed:
+                return typed.tolist()
+        if kind == _BOOL:
+            return list(map(bool, views[0]))
+        if kind == _STR:
+            return str(views[0], "utf-8").split("\0")
+        if kind == _MARSHAL:
+            return marshal.loads(views[0])
+        return pickle.loads(views[0])
+    finally:
+        for view in views:
+            view.release()
+
+def decode_partition(buf, layout):
+    """Rebuild the transaction dicts of `layout` from the shared buffer."""
+    count, columns = layout
+    names = [name for name, _, _, _ in columns]
+    values = [_decode_column(buf, kind, spans) for _, kind, spans, _ in columns]
+    txs = [dict(zip(names, row)) for row in zip(*values)] if names else [{} for _ in range(count)]
+    for name, _, _, mask in columns:
+        if mask is None:
+            continue
+        off, size = mask
+        with buf[off:off + size] as present:
+            for tx, here in zip(txs, present):
+                if not here:
+                    del tx[name]
+    return txs
+
+def _init_worker(pep_list, ofac_list, graph, params):
+    _WORKER_STATE.update(pep_list=pep_list, ofac_list=ofac_list, graph=graph, params=params)
+
+def _run_partition(shm_name, layout):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        txs = decode_partition(shm.buf, layout)
+    finally:
+        shm.close()
+    return evaluate_transactions(
+        txs,
+        _WORKER_STATE["pep_list"],
+        _WORKER_STATE["ofac_list"],
+        _WORKER_STATE["graph"],
+        **_WORKER_STATE["params"]
+    )
+
+def run_partitioned(txs, workers, pep_list, ofac_list, graph, params):
+    """
+    Hash-partition `txs` by customer_id and evaluate each partition in its own
+    process. Every batch rule is keyed by customer_id and the per-transaction
+    rules are stateless, so the union of partition results equals a
+    single-process run. Each partition is written to shared memory in a
+    columnar layout (see encode_partition) that the worker decodes in place;
+    only the small layout description is pickled. The caller orders the
+    merged results.
+    """
+    blocks = []
+    try:
+        for part in partition_transactions(txs, workers):
+            if not part:
+                continue
+            layout, data = encode_partition(part)
+            shm = shared_memory.SharedMemory(create=True, size=max(len(data), 1))
+            shm.buf[:len(data)] = data
+            blocks.append((shm, layout))
+
+        alerts = []
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(blocks)) or 1,
+            initializer=_init_worker,
+            initargs=(pep_list, ofac_list, graph, params)
+        ) as pool:
+            futures = [pool.submit(_run_partition, shm.name, layout) for shm, layout in blocks]
+            for fut in futures:
+                alerts.extend(fut.result())
+    finally:
+        for shm, _ in blocks:
+            shm.close()
+            shm.unlink()
+
+    return alerts
@@ -0,0 +1,252 @@
+# replay.py - deterministic replay / backtest of archived transaction files
+
+import argparse
+import hashlib
+import json
+import logging
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+from agent import PROCESSED_DIR
+from clock import SimulatedClock
+from data_loader import (
+    load_structured,
+    parse_unstructured,
+    load_pep_list,
+    load_ofac_list,
+    load_ownership_graph,
+    load_list_file
+)
+from engine import run_compliance
+from rules import RULE_META, required_columns
+from config import (
+    STRUCTURED_EXT,
+    UNSTRUCTURED_EXT,
+    REPLAY_DIR,
+    CTR_THRESHOLD_DEFAULT,
+    EXPOSURE_THRESHOLD_DEFAULT,
+    SAR_TXN_COUNT_THRESHOLD_DEFAULT,
+    MIN_RETENTION_YEARS_DEFAULT,
+    REQUIRE_SOF_FOR_CASH,
+    SOF_AMOUNT_THRESHOLD,
+    VELOCITY_TXN_THRESHOLD_DEFAULT,
+    VELOCITY_WINDOW_MINUTES_DEFAULT,
+    GEOJUMP_WINDOW_MINUTES_DEFAULT,
+    STRUCTURING_WINDOWS_MINUTES
+)
+
+def _parse_ts(ts):
+    try:
+        dt = datetime.fromisoformat(ts)
+    except (TypeError, ValueError):
+        return None
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+def load_archive(archive_dir=PROCESSED_DIR):
+    """
+    Load every archived file, drop repeated tx_ids (first copy wins) and
+    return (timestamp, tx) pairs in timestamp order. Rows without a parseable
+    timestamp cannot be placed on the timeline and are counted as skipped.
+    """
+    columns = required_columns(RULE_META)
+    timeline, seen, skipped = [], set(), 0
+    for file in sorted(Path(archive_dir).iterdir()):
+        ext = file.suffix.lstrip(".").lower()
+        if ext in STRUCTURED_EXT:
+            txs = load_structured(file, ext, columns)
+        elif ext in UNSTRUCTURED_EXT:
+            with file.open("rb") as f:
+                txs = parse_unstructured(f)
+        else:
+            continue
+        for tx in txs:
+            tx_id = tx.get("tx_id")
+            if tx_id is not None and tx_id == tx_id:  # skip None / NaN
+                if tx_id in seen:
+                    continue
+                seen.add(tx_id)
+            dt = _parse_ts(tx.get("timestamp"))
+            if dt is None:
+                skipped += 1
+                continue
+            timeline.append((dt, tx))
+    timeline.sort(key=lambda item: item[0])
+    if skipped:
+        logging.warning(f"Replay: skipped {skipped} transactions without a usable timestamp")
+    return timeline
+
+def _batches_by_day(timeline):
+    # One simulated agent run per UTC calendar day
+    day, batch = None, []
+    for dt, tx in timeline:
+        if dt.date() != day and batch:
+            yield day, batch
+            batch = []
+        day = dt.date()
+        batch.append((dt, tx))
+    if batch:
+        yield day, batch
+
+def _digest(entries):
+    return hashlib.sha256("\n".join(sorted(map(str, entries))).encode("utf-8")).hexdigest()
+
+def pin_lists(pep_path=None, ofac_path=None, graph_path=None):
+    """
+    Fix the PEP/OFAC lists and ownership graph for a whole replay: the given
+    files (CSV, or a JSON list snapshot for PEP/OFAC), else the current lists
+    loaded once. Returns (lists, identity): run_compliance keyword arguments
+    and, per input, its source and a digest of its contents.
+    """
+    pep = load_list_file(pep_path, "pep") if pep_path else set(load_pep_list() or ())
+    ofac = load_list_file(ofac_path, "ofac") if ofac_path else set(load_ofac_list() or ())
+    graph = load_ownership_graph(graph_path) if graph_path else load_ownership_graph()
+    edges = (f"{parent}>{child}" for parent, children in graph.items() for child in children)
+    identity = {
+        "pep_list":  {"source": str(pep_path or "live"), "sha256": _digest(pep)},
+        "ofac_list": {"source": str(ofac_path or "live"), "sha256": _digest(ofac)},
+        "graph":     {"source": str(graph_path or "live"), "sha256": _digest(edges)},
+    }
+    return dict(pep_list=pep, ofac_list=ofac, graph=graph), identity
+
+class Checkpoint:
+    """Progress and running totals of a named replay, stored as JSON."""
+
+    def __init__(self, name, directory=REPLAY_DIR):
+        self.path = Path(directory) / f"{name}.json"
+        self.state = {"last_day": None, "tx_count": 0, "alert_counts": {}}
+        if self.path.exists():
+            self.state = json.loads(self.path.read_text())
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.state, indent=2))
+        tmp.replace(self.path)
+
+def replay(
+    timeline,
+    checkpoint,
+    params,
+    pinned=None,
+    checkpoint_every=100,
+    on_alerts=None
+):
+    """
+    Feed `timeline` through run_compliance one simulated day at a time, with
+    the clock set to the newest transaction in the batch. Days at or before
+    the checkpoint are skipped, so an interrupted replay resumes where it
+    stopped. Returns totals for the whole replay including earlier sessions.
+
+    Every batch is screened against the same lists, `pinned` as returned by
+    pin_lists() (the current lists, loaded once, if None). Their identity is
+    stored with the parameters, so a checkpoint cannot be resumed against
+    different lists.
+
+    Limitation: like a daily agent run, each batch sees only its own day, so
+    windowed rules never look back across midnight. Structuring windows
+    longer than a day (e.g. the 7d default) cannot fire during a replay.
+    """
+    clock = SimulatedClock()
+    lists, identity = pinned or pin_lists()
+    recorded = dict(params, lists=identity)
+    state = checkpoint.state
+    if state.get("params", recorded) != recorded:
+        raise ValueError(
+            f"Checkpoint {checkpoint.path} was written with different parameters or lists; "
+            "use another name or restart it"
+        )
+    state["params"] = recorded
+    if max(STRUCTURING_WINDOWS_MINUTES) > 24 * 60:
+        logging.warning("Replay: batches are one day long; structuring windows over "
+                        "24h will not fire")
+    counts = Counter(state["alert_counts"])
+    done = 0
+    tx_done = 0
+    start = time.perf_counter()
+
+    for day, batch in _batches_by_day(timeline):
+        if state["last_day"] and day.isoformat() <= state["last_day"]:
+            continue
+        clock.advance_to(batch[-1][0])
+        txs = [tx for _, tx in batch]
+        alerts = run_compliance(txs, clock=clock, **params, **lists)
+        counts.update(rule for rule, _, _ in alerts)
+        if on_alerts:
+            on_alerts(day, alerts)
+
+        tx_done += len(txs)
+        done += 1
+        state["last_day"] = day.isoformat()
+        state["tx_count"] += len(txs)
+        state["alert_counts"] = dict(counts)
+        if done % checkpoint_every == 0:
+            checkpoint.save()
+            elapsed = time.perf_counter() - start
+            logging.info(f"Replay: through {day} ({tx_done / elapsed:,.0f} tx/s)")
+
+    checkpoint.save()
+    elapsed = time.perf_counter() - start
+    state["throughput"] = tx_done / elapsed if elapsed else 0.0
+    return state
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay archived transactions under a simulated clock")
+    parser.add_argument("--archive", default=str(PROCESSED_DIR))
+    parser.add_argument("--name", default="default", help="checkpoint name; reuse to resume")
+    parser.add_argument("--restart", action="store_true", help="ignore an existing checkpoint")
+    parser.add_argument("--ctr-threshold", type=float, default=CTR_THRESHOLD_DEFAULT)
+    parser.add_argument("--exposure-threshold", type=float, default=EXPOSURE_THRESHOLD_DEFAULT)
+    parser.add_argument("--sar-threshold", type=int, default=SAR_TXN_COUNT_THRESHOLD_DEFAULT)
+    parser.add_argument("--min-retention-years", type=int, default=MIN_RETENTION_YEARS_DEFAULT)
+    parser.add_argument("--sof-threshold", type=float, default=SOF_AMOUNT_THRESHOLD)
+    parser.add_argument("--velocity-threshold", type=int, default=VELOCITY_TXN_THRESHOLD_DEFAULT)
+    parser.add_argument("--velocity-window", type=int, default=VELOCITY_WINDOW_MINUTES_DEFAULT)
+    parser.add_argument("--geojump-window", type=int, default=GEOJUMP_WINDOW_MINUTES_DEFAULT)
+    parser.add_argument("--no-pep", action="store_true")
+    parser.add_argument("--no-ofac", action="store_true")
+    parser.add_argument("--pep-list", help="pinned PEP list, CSV or JSON snapshot (default: current list)")
+    parser.add_argument("--ofac-list", help="pinned OFAC list, CSV or JSON snapshot (default: current list)")
+    parser.add_argument("--ownership-graph", help="pinned ownership graph CSV (default: current file)")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s: %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S"
+    )
+
+    params = dict(
+        ctr_threshold=args.ctr_threshold,
+        exposure_threshold=args.exposure_threshold,
+        sar_threshold=args.sar_threshold,
+        min_retention_years=args.min_retention_years,
+        enable_pep=not args.no_pep,
+        enable_ofac=not args.no_ofac,
+        ownership_file=None,
+        require_sof=REQUIRE_SOF_FOR_CASH,
+        sof_threshold=args.sof_threshold,
+        velocity_threshold=args.velocity_threshold,
+        velocity_window_minutes=args.velocity_window,
+        geojump_window_minutes=args.geojump_window
+    )
+
+    checkpoint = Checkpoint(args.name)
+    if args.restart:
+        checkpoint.state = {"last_day": None, "tx_count": 0, "alert_counts": {}}
+
+    timeline = load_archive(args.archive)
+    logging.info(f"Replay: {len(timeline)} transactions loaded from {args.archive}")
+    pinned = pin_lists(args.pep_list, args.ofac_list, args.ownership_graph)
+    for name, source in pinned[1].items():
+        logging.info(f"Replay: {name} from {source['source']} (sha256 {source['sha256'][:12]})")
+    state = replay(timeline, checkpoint, params, pinned)
+
+    logging.info(f"Replay complete through {state['last_day']}: "
+                 f"{state['tx_count']} txns, {state['throughput']:,.0f} tx/s this session")
+    for rule, count in sorted(state["alert_counts"].items(), key=lambda kv: -kv[1]):
+        print(f"{rule:<24} {count}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+# rescreen.py - retroactive PEP/OFAC screening of history when the lists change
+
+import json
+import logging
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from data_loader import load_pep_list, load_ofac_list, load_structured, parse_unstructured
+from rules import required_columns
+from config import (
+    STRUCTURED_EXT,
+    UNSTRUCTURED_EXT,
+    HISTORY_INDEX_PATH,
+    LIST_SNAPSHOT_DIR,
+    RESCREEN_LOOKBACK_DAYS
+)
+
+# SQLite caps bound parameters per statement
+_IN_BATCH = 500
+
+def _key(value):
+    if value is None or value != value or value == "":  # None / NaN / blank
+        return None
+    return str(value)
+
+def file_key(path):
+    # Name plus size, so a new file reusing an archived name is still indexed
+    path = Path(path)
+    return f"{path.name}:{path.stat().st_size}"
+
+class HistoryIndex:
+    """
+    Account and customer index over processed transactions, so a changed
+    list entry can be traced to the affected transactions without rescanning
+    the archive. Each source file is indexed once.
+    """
+
+    def __init__(self, path=HISTORY_INDEX_PATH):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS files (name TEXT PRIMARY KEY);
+            CREATE TABLE IF NOT EXISTS accounts (account TEXT, role TEXT, tx_id TEXT, ts TEXT);
+            CREATE TABLE IF NOT EXISTS customers (customer_id TEXT, tx_id TEXT, ts TEXT);
+            CREATE INDEX IF NOT EXISTS accounts_account ON accounts(account);
+            CREATE INDEX IF NOT EXISTS customers_customer ON customers(customer_id);
+        """)
+        self._db.commit()
+
+    def has_file(self, name):
+        return self._db.execute("SELECT 1 FROM files WHERE name = ?", (name,)).fetchone() is not None
+
+    def add_file(self, name, txs):
+        with self._lock:
+            if self.has_file(name):
+                return
+            accounts, customers = [], []
+            for tx in txs:
+                tx_id, ts = _key(tx.get("tx_id")), _key(tx.get("timestamp"))
+                for role, field in (("Sender", "sender_account"), ("Receiver", "receiver_account")):
+                    account = _key(tx.get(field))
+                    if account:
+                        accounts.append((account, role, tx_id, ts))
+                cid = _key(tx.get("customer_id"))
+                if cid:
+                    customers.append((cid, tx_id, ts))
+            self._db.executemany("INSERT INTO accounts VALUES (?, ?, ?, ?)", accounts)
+            self._db.executemany("INSERT INTO customers VALUES (?, ?, ?)", customers)
+            self._db.execute("INSERT INTO files VALUES (?)", (name,))
+            self._db.commit()
+
+    def sync(self, directory):
+        """Index any file in `directory` that is not indexed yet."""
+        directory = Path(directory)
+        if not directory.is_dir():  # e.g. nothing archived yet
+            return
+        columns = required_columns(["OFACMatch", "PEPMatch"])
+        for file in sorted(directory.iterdir()):
+            key = file_key(file)
+            if self.has_file(key):
+                continue
+            ext = file.suffix.lstrip(".").lower()
+            if ext in STRUCTURED_EXT:
+                self.add_file(key, load_structured(file, ext, columns))
+            elif ext in UNSTRUCTURED_EXT:
+                with file.open("rb") as f:
+                    self.add_file(key, parse_unstructured(f))
+
+    def _lookup(self, sql, keys, since):
+        rows = []
+        keys = sorted(keys)
+        for i in range(0, len(keys), _IN_BATCH):
+            batch = keys[i:i + _IN_BATCH]
+            marks = ",".join("?" * len(batch))
+            rows.extend(self._db.execute(sql.format(marks=marks), (*batch, since or "")))
+        return rows
+
+    def transactions_for_accounts(self, accounts, since=None):
+        return self._lookup(
+            "SELECT DISTINCT account, role, tx_id FROM accounts "
+            "WHERE account IN ({marks}) AND (ts >= ? OR ts IS NULL) ORDER BY tx_id, role DESC",
+            accounts, since
+        )
+
+    def customers_with_history(self, customer_ids, since=None):
+        return [row[0] for row in self._lookup(
+            "SELECT DISTINCT customer_id FROM customers "
+            "WHERE customer_id IN ({marks}) AND (ts >= ? OR ts IS NULL) ORDER BY customer_id",
+            customer_ids, since
+        )]
+
+def diff_lists(old, new):
+    """Entries added to and removed from a screening list."""
+    return new - old, old - new
+
+def _snapshot_path(name):
+    return Path(LIST_SNAPSHOT_DIR) / f"{name}.json"
+
+def load_snapshot(name):
+    path = _snapshot_path(name)
+    if not path.exists():
+        return None
+    return set(json.loads(path.read_text()))
+
+def save_snapshot(name, entries):
+    path = _snapshot_path(name)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(sorted(entries)))
+    tmp.replace(path)
+
+def rescreen(index, pep_added=(), ofac_added=(), since=None):
+    """
+    Screen indexed history against newly added list entries only. Alerts use
+    the live rule names and entities with a "Retroactive:" detail prefix.
+    """
+    alerts = []
+    for cid in index.customers_with_history(pep_added, since):
+        alerts.append(("PEPMatch", cid, "Retroactive: PEP customer"))
+    for account, role, tx_id in index.transactions_for_accounts(ofac_added, since):
+        alerts.append(("OFACMatch", tx_id, f"Retroactive: {role} {account}"))
+    return alerts
+
+def rescreen_changed_lists(index, lookback_days=RESCREEN_LOOKBACK_DAYS, now=None):
+    """
+    Compare the current PEP/OFAC lists with the last snapshots and re-screen
+    the last `lookback_days` of history (all of it if None) against added
+    entries. Returns (alerts, snapshots); pass the snapshots to
+    save_snapshots() once the alerts have been delivered, so a failed run
+    re-screens the same changes next time. The first run only records a
+    baseline. A list that failed to load (empty) is left alone.
+    """
+    now = now or datetime.now(timezone.utc)
+    since = (now - timedelta(days=lookback_days)).date().isoformat() if lookback_days else None
+    added, currents = {}, {}
+    for name, loader in (("pep", load_pep_list), ("ofac", load_ofac_list)):
+        current = set(loader() or ())
+        if not current:
+            continue
+        currents[name] = current
+        previous = load_snapshot(name)
+        if previous is not None:
+            new, removed = diff_lists(previous, current)
+            if new or removed:
+                logging.info(f"{name.upper()} list changed: +{len(new)} / -{len(removed)} entries")
+            added[name] = new
+
+    alerts = rescreen(index, added.get("pep", ()), added.get("ofac", ()), since)
+    return alerts, currents
+
+def save_snapshots(snapshots):
+    """Move the list baselines forward to what rescreen_changed_lists saw."""
+    for name, entries in snapshots.items():
+        save_snapshot(name, entries)
+
+_INDEX = None
+
+def get_history_index():
+    global _INDEX
+    if _INDEX is None:
+        _INDEX = HistoryIndex()
+    return _INDEX
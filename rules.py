@@ -7,7 +7,11 @@ from config import (
     MIN_RETENTION_YEARS_DEFAULT,
     VELOCITY_TXN_THRESHOLD_DEFAULT,
     VELOCITY_WINDOW_MINUTES_DEFAULT,
-    GEOJUMP_WINDOW_MINUTES_DEFAULT
+    GEOJUMP_WINDOW_MINUTES_DEFAULT,
+    STRUCTURING_WINDOWS_MINUTES,
+    STRUCTURING_MARGIN,
+    STRUCTURING_MIN_TXNS,
+    STRUCTURING_PURPOSE_CODE
 )
 
 # Static AML parameters
@@ -25,6 +29,7 @@ RULE_META = {
     "EDDHierarchyFailure":    ("AML Section 4", "Beneficial-owner hierarchy"),
     "EDDFailure":             ("AML Section 4", "Missing source-of-funds"),
     "VelocityAnomaly":        ("AML Section 6", "High transaction velocity"),
+    "Structuring":            ("AML Section 6", "Sub-CTR cash deposits summing over threshold"),
     "GeoJump":                ("AML Section 6", "Unusual geolocation jump"),
     "MissingField":           ("BCBS 239 P4", "Completeness: missing field"),
     "NegativeAmount":         ("BCBS 239 P3", "Accuracy: negative amount"),
@@ -35,6 +40,59 @@ RULE_META = {
     "SoDViolation":           ("SOX 404",   "Segregation of duties")
 }
 
+# Triage severity per rule (1 = informational .. 5 = critical)
+RULE_SEVERITY = {
+    "LargeTxn":               3,
+    "CIPFailure":             3,
+    "HighRiskCustomer":       2,
+    "SuspiciousActivity":     4,
+    "SanctionsHit":           4,
+    "PEPMatch":               4,
+    "OFACMatch":              5,
+    "EDDHierarchyFailure":    4,
+    "EDDFailure":             3,
+    "VelocityAnomaly":        3,
+    "Structuring":            4,
+    "GeoJump":                3,
+    "MissingField":           1,
+    "NegativeAmount":         1,
+    "StaleData":              1,
+    "HighCustomerExposure":   3,
+    "MissingRetention":       1,
+    "RetentionPeriodTooShort":1,
+    "SoDViolation":           2
+}
+
+# Transaction fields read by each rule (drives column projection on load)
+RULE_FIELDS = {
+    "LargeTxn":               ("tx_id", "amount"),
+    "CIPFailure":             ("tx_id", "kyc_completed"),
+    "HighRiskCustomer":       ("tx_id", "risk_rating"),
+    "SuspiciousActivity":     ("customer_id",),
+    "SanctionsHit":           ("tx_id", "sender_country", "receiver_country"),
+    "PEPMatch":               ("customer_id",),
+    "OFACMatch":              ("tx_id", "sender_account", "receiver_account"),
+    "EDDHierarchyFailure":    ("customer_id", "risk_rating"),
+    "EDDFailure":             ("tx_id", "purpose_code", "amount", "source_of_funds"),
+    "VelocityAnomaly":        ("tx_id", "customer_id", "timestamp"),
+    "Structuring":            ("tx_id", "customer_id", "timestamp", "amount", "purpose_code"),
+    "GeoJump":                ("tx_id", "customer_id", "timestamp", "sender_country", "receiver_country"),
+    "MissingField":           ("tx_id", "timestamp", "amount", "currency", "customer_id"),
+    "NegativeAmount":         ("tx_id", "amount"),
+    "StaleData":              ("tx_id", "timestamp"),
+    "HighCustomerExposure":   ("customer_id", "amount"),
+    "MissingRetention":       ("tx_id", "retention_period"),
+    "RetentionPeriodTooShort":("tx_id", "retention_period"),
+    "SoDViolation":           ("tx_id", "initiator_id", "approver_id")
+}
+
+def required_columns(rules):
+    # tx_id/timestamp are always needed to date and attribute alerts
+    cols = {"tx_id", "timestamp"}
+    for rule in rules:
+        cols.update(RULE_FIELDS.get(rule, ()))
+    return sorted(cols)
+
 def evaluate_aml_rules(tx, ctr_threshold=CTR_THRESHOLD_DEFAULT):
     alerts = []
     if tx.get("amount", 0) > ctr_threshold:
@@ -48,20 +106,26 @@ def evaluate_aml_rules(tx, ctr_threshold=CTR_THRESHOLD_DEFAULT):
         alerts.append(("SanctionsHit", tx.get("tx_id"), pair))
     return alerts
 
-def evaluate_sar_batch(txs, sar_threshold=SAR_TXN_COUNT_THRESHOLD_DEFAULT):
-    counts = {}
+def evaluate_sar_batch(txs, sar_threshold=SAR_TXN_COUNT_THRESHOLD_DEFAULT, approximate=False):
     alerts = []
-    for tx in txs:
-        cid = tx.get("customer_id")
-        counts[cid] = counts.get(cid, 0) + 1
+    if approximate:
+        # Bounded memory: Count-Min + exact recount of top-K candidates
+        from sketches import heavy_hitters
+        counts, _ = heavy_hitters(txs, "customer_id", sar_threshold)
+    else:
+        counts = {}
+        for tx in txs:
+            cid = tx.get("customer_id")
+            counts[cid] = counts.get(cid, 0) + 1
     for cid, count in counts.items():
         if count > sar_threshold:
             alerts.append(("SuspiciousActivity", cid, f"{count} txns"))
     return alerts
 
-def evaluate_bcbs239_batch(txs, exposure_threshold=EXPOSURE_THRESHOLD_DEFAULT):
+def evaluate_bcbs239_batch(txs, exposure_threshold=EXPOSURE_THRESHOLD_DEFAULT, approximate=False, now=None):
     alerts = []
-    now = datetime.now(timezone.utc)
+    # `now` is injectable so replays judge staleness against simulated time
+    now = now or datetime.now(timezone.utc)
     required = ["tx_id", "timestamp", "amount", "currency", "customer_id"]
     for tx in txs:
         for f in required:
@@ -72,14 +136,20 @@ def evaluate_bcbs239_batch(txs, exposure_threshold=EXPOSURE_THRESHOLD_DEFAULT):
         ts = tx.get("timestamp", "")
         try:
             dt = datetime.fromisoformat(ts)
+            if dt.tzinfo is None:
+                dt = dt.replace(tzinfo=timezone.utc)
             if now - dt > timedelta(hours=24):
                 alerts.append(("StaleData", tx.get("tx_id"), ts))
         except:
             alerts.append(("StaleData", tx.get("tx_id", "<unk>"), ts))
-    exposures = {}
-    for tx in txs:
-        cid = tx.get("customer_id")
-        exposures[cid] = exposures.get(cid, 0) + tx.get("amount", 0)
+    if approximate:
+        from sketches import heavy_hitters
+        exposures, _ = heavy_hitters(txs, "customer_id", exposure_threshold, value="amount")
+    else:
+        exposures = {}
+        for tx in txs:
+            cid = tx.get("customer_id")
+            exposures[cid] = exposures.get(cid, 0) + tx.get("amount", 0)
     for cid, total in exposures.items():
         if total > exposure_threshold:
             alerts.append(("HighCustomerExposure", cid, total))
@@ -132,36 +202,132 @@ def evaluate_edd_sof(tx, require_sof, sof_threshold):
             alerts.append(("EDDFailure", tx.get("tx_id"), f"Missing SOF >{sof_threshold}"))
     return alerts
 
-def evaluate_velocity_batch(
-    txs,
-    txn_threshold=VELOCITY_TXN_THRESHOLD_DEFAULT,
-    window_minutes=VELOCITY_WINDOW_MINUTES_DEFAULT
-):
-    alerts = []
+def _customer_timelines(txs, include=None):
+    """
+    Per-customer [(timestamp, tx)] lists in time order. Naive timestamps are
+    read as UTC so they sort alongside offset-aware ones.
+    """
     from collections import defaultdict
     cust_tx = defaultdict(list)
     for tx in txs:
-        cid = tx.get("customer_id")
+        if include and not include(tx):
+            continue
         try:
             ts = datetime.fromisoformat(tx.get("timestamp"))
-            cust_tx[cid].append((ts, tx))
         except:
             continue
-    for cid, records in cust_tx.items():
+        if ts.tzinfo is None:
+            ts = ts.replace(tzinfo=timezone.utc)
+        cust_tx[tx.get("customer_id")].append((ts, tx))
+    for records in cust_tx.values():
         records.sort(key=lambda x: x[0])
-        start = 0
-        for end in range(len(records)):
-            while (records[end][0] - records[start][0]).total_seconds() > window_minutes * 60:
+    return cust_tx
+
+def find_window_bursts(records, window_minutes, qualifies, value=None):
+    """
+    Sliding-window scan of one customer's sorted timeline over several
+    windows at once. A single pass advances one start pointer per window and
+    reads window sums from prefix sums, so the scan is O(n * len(windows)).
+
+    `qualifies(count, total)` is tested for every window ending at every
+    record; each maximal run of qualifying window ends is one burst. Yields
+    (window_minutes, first, last, count, total): the burst covers
+    records[first..last], and count/total describe its busiest window.
+    """
+    prefix = [0]
+    for _, tx in records:
+        prefix.append(prefix[-1] + (value(tx) if value else 0))
+    spans = [m * 60 for m in window_minutes]
+    starts = [0] * len(spans)
+    open_bursts = [None] * len(spans)
+    for end, (ts, _) in enumerate(records):
+        for w, span in enumerate(spans):
+            start = starts[w]
+            while (ts - records[start][0]).total_seconds() > span:
                 start += 1
-            if (end - start + 1) > txn_threshold:
-                for i in range(start, end + 1):
-                    tx = records[i][1]
-                    alerts.append((
-                        "VelocityAnomaly",
-                        tx["tx_id"],
-                        f"{txn_threshold+1} txns in {window_minutes}m"
-                    ))
-                break
+            starts[w] = start
+            count, total = end - start + 1, prefix[end + 1] - prefix[start]
+            burst = open_bursts[w]
+            if qualifies(count, total):
+                if burst is None:
+                    open_bursts[w] = [start, end, count, total]
+                else:
+                    burst[1] = end
+                    if (count, total) > (burst[2], burst[3]):
+                        burst[2], burst[3] = count, total
+            elif burst is not None:
+                yield (window_minutes[w], *burst)
+                open_bursts[w] = None
+    for w, burst in enumerate(open_bursts):
+        if burst is not None:
+            yield (window_minutes[w], *burst)
+
+def evaluate_velocity_batch(
+    txs,
+    txn_threshold=VELOCITY_TXN_THRESHOLD_DEFAULT,
+    window_minutes=VELOCITY_WINDOW_MINUTES_DEFAULT
+):
+    alerts = []
+    for cid, records in _customer_timelines(txs).items():
+        flagged = -1  # last record already alerted; bursts may overlap
+        for _, first, last, count, _ in find_window_bursts(
+            records, [window_minutes], lambda count, total: count > txn_threshold
+        ):
+            for i in range(max(first, flagged + 1), last + 1):
+                alerts.append((
+                    "VelocityAnomaly",
+                    records[i][1]["tx_id"],
+                    f"{count} txns in {window_minutes}m"
+                ))
+            flagged = max(flagged, last)
+    return alerts
+
+def evaluate_structuring_batch(
+    txs,
+    ctr_threshold=CTR_THRESHOLD_DEFAULT,
+    windows_minutes=STRUCTURING_WINDOWS_MINUTES,
+    margin=STRUCTURING_MARGIN,
+    min_txns=STRUCTURING_MIN_TXNS,
+    purpose_code=STRUCTURING_PURPOSE_CODE
+):
+    """
+    Structuring: at least `min_txns` cash deposits, each under the CTR
+    threshold but within `margin` of it, whose sum within one window exceeds
+    the threshold. Every burst is reported once: a larger window's burst
+    spanning exactly the records a smaller window already reported is
+    skipped. The alert names the burst's last transaction so it can be
+    dated and traced to its customer.
+    """
+    floor = ctr_threshold * (1 - margin)
+
+    def sub_ctr_deposit(tx):
+        amount = tx.get("amount")
+        return (
+            tx.get("purpose_code") == purpose_code
+            and isinstance(amount, (int, float))
+            and floor <= amount < ctr_threshold
+        )
+
+    alerts = []
+    for cid, records in _customer_timelines(txs, sub_ctr_deposit).items():
+        bursts = find_window_bursts(
+            records,
+            windows_minutes,
+            lambda count, total: count >= min_txns and total > ctr_threshold,
+            value=lambda tx: tx["amount"]
+        )
+        covered = set()
+        for window, first, last, count, total in sorted(bursts, key=lambda b: b[0]):
+            if (first, last) in covered:
+                continue
+            covered.add((first, last))
+            alerts.append((
+                "Structuring",
+                records[last][1].get("tx_id") or cid,
+                f"customer {cid}: {count} cash deposits totalling {total:,.2f} under "
+                f"{ctr_threshold} in {window}m "
+                f"({records[first][0].isoformat()} to {records[last][0].isoformat()})"
+            ))
     return alerts
 
 def evaluate_geo_jump_batch(
@@ -0,0 +1,118 @@
+# sketches.py - bounded-memory per-key counts and sums for the batch rules
+
+import heapq
+import logging
+import math
+from array import array
+
+from config import (
+    SKETCH_EPSILON,
+    SKETCH_DELTA,
+    SKETCH_TOP_K
+)
+
+class CountMinSketch:
+    """
+    Count-Min sketch over non-negative increments. Estimates never
+    undercount; with probability 1 - delta they overcount by at most
+    epsilon * (sum of all increments).
+    """
+
+    def __init__(self, epsilon=SKETCH_EPSILON, delta=SKETCH_DELTA):
+        self.width = math.ceil(math.e / epsilon)
+        self.depth = math.ceil(math.log(1 / delta))
+        self.rows = [array("d", bytes(8 * self.width)) for _ in range(self.depth)]
+
+    def _cells(self, key):
+        # The sketch never leaves the process, so the builtin (salted) hash
+        # is enough; double hashing derives one cell per row from it.
+        h = hash(key) & 0xFFFFFFFFFFFFFFFF
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        width = self.width
+        return [(h1 + i * h2) % width for i in range(self.depth)]
+
+    def nbytes(self):
+        return sum(row.itemsize * len(row) for row in self.rows)
+
+    def add(self, key, value=1):
+        """Add `value` to `key` and return the updated estimate."""
+        estimate = math.inf
+        for row, cell in zip(self.rows, self._cells(key)):
+            row[cell] += value
+            estimate = min(estimate, row[cell])
+        return estimate
+
+    def estimate(self, key):
+        return min(row[cell] for row, cell in zip(self.rows, self._cells(key)))
+
+def heavy_hitters(
+    txs,
+    key,
+    threshold,
+    value=None,
+    epsilon=SKETCH_EPSILON,
+    delta=SKETCH_DELTA,
+    top_k=SKETCH_TOP_K
+):
+    """
+    Exact per-key totals for the keys whose total may exceed `threshold`,
+    in first-appearance order, using memory bounded by the sketch size and
+    `top_k` rather than by the number of distinct keys.
+
+    Pass 1 feeds a Count-Min sketch (counts, or positive `value` amounts) and
+    keeps keys whose estimate crosses `threshold` as candidates, pruned to
+    the `top_k` largest estimates. Pass 2 recounts the candidates exactly,
+    so reported totals carry no sketch error. A key is missed only if more
+    than `top_k` keys have estimates above it.
+
+    Returns (totals, overflow). `overflow` is None when no candidate was
+    pruned, else (evictions, lowest, highest): how many candidates were
+    dropped (a key dropped again after re-entering counts twice) and the
+    range of their estimates. Any of them may be a missed hit, so overflow
+    is also logged as a warning; raise `top_k` if it happens.
+    """
+    sketch = CountMinSketch(epsilon, delta)
+    candidates = {}
+    evictions, lowest, highest = 0, math.inf, -math.inf
+
+    def prune(candidates):
+        nonlocal evictions, lowest, highest
+        kept = dict(heapq.nlargest(top_k, candidates.items(), key=lambda kv: kv[1]))
+        for k, est in candidates.items():
+            if k not in kept:
+                evictions += 1
+                lowest, highest = min(lowest, est), max(highest, est)
+        return kept
+
+    for tx in txs:
+        k = tx.get(key)
+        if value is None:
+            inc = 1
+        else:
+            inc = tx.get(value, 0)
+            # Negative/NaN amounts would break the overestimate guarantee
+            if not (isinstance(inc, (int, float)) and inc > 0):
+                continue
+        est = sketch.add(k, inc)
+        if est > threshold:
+            candidates[k] = est
+            if len(candidates) > 2 * top_k:
+                candidates = prune(candidates)
+    if len(candidates) > top_k:
+        candidates = prune(candidates)
+
+    overflow = None
+    if evictions:
+        overflow = (evictions, lowest, highest)
+        logging.warning(
+            f"Sketch: {evictions} {key} candidates over {threshold} evicted beyond "
+            f"top_k={top_k} (estimates {lowest:,.0f}-{highest:,.0f}); their alerts "
+            "may be missing, raise SKETCH_TOP_K"
+        )
+
+    totals = {}
+    for tx in txs:
+        k = tx.get(key)
+        if k in candidates:
+            totals[k] = totals.get(k, 0) + (1 if value is None else tx.get(value, 0))
+    return totals, overflow
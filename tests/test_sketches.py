@@ -0,0 +1,66 @@
+# tests/test_sketches.py - sketch-backed aggregation against the exact path
+
+import random
+
+from rules import evaluate_sar_batch, evaluate_bcbs239_batch
+from sketches import heavy_hitters
+
+def synthetic(count=20_000, customers=5_000, heavy=20, seed=7):
+    rng = random.Random(seed)
+    hot = [f"HOT-{i}" for i in range(heavy)]
+    txs = []
+    for i in range(count):
+        cid = rng.choice(hot) if rng.random() < 0.05 else f"C-{rng.randrange(customers)}"
+        txs.append({"tx_id": f"T-{i}", "amount": round(rng.uniform(-50, 5_000), 2), "customer_id": cid})
+    return txs
+
+def exact_totals(txs, value=None):
+    totals = {}
+    for tx in txs:
+        cid = tx["customer_id"]
+        totals[cid] = totals.get(cid, 0) + (1 if value is None else tx[value])
+    return totals
+
+def test_sar_sketch_alerts_are_subset_of_exact():
+    txs = synthetic()
+    exact = evaluate_sar_batch(txs, sar_threshold=5)
+    approx = evaluate_sar_batch(txs, sar_threshold=5, approximate=True)
+    assert approx
+    assert set(approx) <= set(exact)
+
+def test_exposure_sketch_alerts_are_subset_of_exact():
+    txs = synthetic()
+    exact = {a for a in evaluate_bcbs239_batch(txs, 50_000) if a[0] == "HighCustomerExposure"}
+    approx = {a for a in evaluate_bcbs239_batch(txs, 50_000, approximate=True)
+              if a[0] == "HighCustomerExposure"}
+    assert approx
+    assert approx <= exact
+
+def test_totals_are_recounted_exactly():
+    txs = synthetic()
+    for value, threshold in ((None, 5), ("amount", 50_000)):
+        truth = exact_totals(txs, value)
+        totals, _ = heavy_hitters(txs, "customer_id", threshold, value=value, epsilon=1e-3)
+        assert totals
+        for cid, total in totals.items():
+            assert total == truth[cid]
+
+def test_full_recall_when_heavy_keys_fit_top_k():
+    # Light customers stay well below both thresholds; top_k leaves headroom
+    # for the odd light key the (randomly salted) sketch overestimates
+    txs = synthetic(customers=50_000)
+    for value, threshold in ((None, 5), ("amount", 50_000)):
+        truth = {k for k, v in exact_totals(txs, value).items() if v > threshold}
+        totals, overflow = heavy_hitters(
+            txs, "customer_id", threshold, value=value, top_k=2 * len(truth)
+        )
+        assert overflow is None
+        assert {k for k, v in totals.items() if v > threshold} == truth
+
+def test_overflow_is_reported():
+    txs = [{"customer_id": f"C{i}"} for i in range(300) for _ in range(10)]
+    totals, overflow = heavy_hitters(txs, "customer_id", 5, top_k=100)
+    assert len(totals) == 100
+    evictions, lowest, highest = overflow
+    assert evictions >= 200
+    assert 5 < lowest <= highest
@@ -0,0 +1,80 @@
+# triage.py - risk-scored alert triage with bounded top-K selection
+
+import heapq
+import math
+
+from rules import RULE_SEVERITY
+from config import TRIAGE_TOP_K
+
+# Multipliers for the customer's risk_rating on the alerted transaction
+RISK_WEIGHT = {"High": 2.0, "Medium": 1.3, "Low": 1.0}
+
+# Applied once per entity with any PEP or OFAC hit
+SCREENING_BOOST = 2.0
+SCREENING_RULES = {"PEPMatch", "OFACMatch"}
+
+def _number(value):
+    return value if isinstance(value, (int, float)) and value == value else 0
+
+def alert_score(rule, tx, detail):
+    """
+    Score of a single alert: rule severity, scaled logarithmically by the
+    amount at stake and by the customer's risk rating.
+    """
+    severity = RULE_SEVERITY.get(rule, 1)
+    amount = _number(tx.get("amount")) if tx else _number(detail)
+    risk = RISK_WEIGHT.get(tx.get("risk_rating") if tx else None, 1.0)
+    return severity * (1 + math.log10(1 + max(amount, 0) / 1_000)) * risk
+
+def triage_alerts(txs, alerts, top_k=TRIAGE_TOP_K, tx_index=None):
+    """
+    Rank alerted entities by risk and return the top `top_k`, highest first,
+    as dicts with entity, score, and that entity's alerts.
+
+    Transaction-level alerts are attributed to the transaction's customer,
+    or to the transaction itself when it has none; customer- and owner-level
+    alerts to the entity they name. Scores are accumulated per entity, the
+    top K are picked with a K-sized heap (no sort over all alerts), and only
+    their alerts are kept in a second pass.
+
+    Memory is O(alerted entities) for the score table plus O(transactions)
+    for `tx_index` when it is not passed in; only the selection itself is
+    bounded by K.
+    """
+    if tx_index is None:
+        tx_index = {tx.get("tx_id"): tx for tx in txs}
+
+    def entity_of(entity):
+        tx = tx_index.get(entity)
+        cid = tx.get("customer_id") if tx else None
+        # Without a customer (e.g. parsed .txt rows) the tx stands on its own
+        if cid is None or cid != cid or cid == "":
+            return entity, tx
+        return cid, tx
+
+    scores = {}
+    screened = set()
+    for rule, entity, detail in alerts:
+        key, tx = entity_of(entity)
+        scores[key] = scores.get(key, 0.0) + alert_score(rule, tx, detail)
+        if rule in SCREENING_RULES:
+            screened.add(key)
+    for key in screened:
+        scores[key] *= SCREENING_BOOST
+
+    top = heapq.nlargest(top_k, scores.items(), key=lambda kv: kv[1])
+    ranked = {key: {"entity": key, "score": round(score, 2), "alerts": []} for key, score in top}
+    for alert in alerts:
+        key, _ = entity_of(alert[1])
+        if key in ranked:
+            ranked[key]["alerts"].append(alert)
+    return list(ranked.values())
+
+def prioritize(alerts, ranked):
+    """
+    Alerts of the ranked entities first, in rank order, followed by all
+    other alerts in their original order.
+    """
+    first = [alert for entry in ranked for alert in entry["alerts"]]
+    seen = {id(alert) for alert in first}
+    return first + [alert for alert in alerts if id(alert) not in seen]
@@ -1,12 +1,16 @@
 # ui.py
 
 import streamlit as st
-import altair as alt
 import pandas as pd
-import csv, io
+import os
+import tempfile
 from collections import Counter
 from datetime import datetime
-import networkx as nx
+
+from export import EXPORT_FORMATS, export_alerts
+
+# altair and networkx are imported where used; each costs more to import
+# than the rest of the page setup.
 
 def configure_page():
     st.set_page_config(
@@ -23,6 +27,7 @@ def sidebar_settings(
     structured_ext,
     unstructured_ext,
     date_filter_default,
+    export_formats,
     ctr_default,
     exposure_default,
     sar_default,
@@ -37,7 +42,12 @@ def sidebar_settings(
     uploaded_file = st.sidebar.file_uploader(
         "Upload transactions file",
         type=list(structured_ext.union(unstructured_ext)),
-        help="Structured CSV/JSON/XLSX or plain-text (.txt)"
+        help="Structured CSV/JSON/XLSX/Parquet/Arrow or plain-text (.txt)"
+    )
+    skip_seen = st.sidebar.checkbox(
+        "Skip previously ingested transactions",
+        value=True,
+        help="Drop rows whose tx_id the agent already ingested (re-delivered files)"
     )
 
     st.sidebar.markdown("---")
@@ -46,7 +56,14 @@ def sidebar_settings(
     selected_rules = st.sidebar.multiselect("Rules", options=all_rules, default=all_rules)
     all_regs = sorted({meta[0] for meta in RULE_META.values()})
     selected_regs = st.sidebar.multiselect("Regulations", options=all_regs, default=all_regs)
-    date_filter = st.sidebar.date_input("From Date", value=date_filter_default)
+    date_filter = st.sidebar.date_input(
+        "From Date",
+        value=date_filter_default,
+        help="Rows dated earlier are dropped on load, so batch rules (SAR counts, "
+             "exposure, windows) only see transactions from this date on"
+    )
+
+    export_format = st.sidebar.selectbox("Export format", options=list(export_formats))
 
     st.sidebar.markdown("---")
     st.sidebar.markdown("### Thresholds")
@@ -87,6 +104,7 @@ def sidebar_settings(
                 missing = expected - actual
                 st.sidebar.error(f"Ownership graph missing columns: {', '.join(missing)}")
             else:
+                import networkx as nx
                 G = nx.DiGraph()
                 G.add_edges_from(df_graph[['parent_id', 'child_id']].values)
                 cycle = next(nx.simple_cycles(G), None)
@@ -131,7 +149,9 @@ def sidebar_settings(
         sof_threshold,
         velocity_threshold,
         velocity_window_minutes,
-        geojump_window_minutes
+        geojump_window_minutes,
+        skip_seen,
+        export_format
     )
 
 def show_metrics(txs, filtered):
@@ -144,6 +164,7 @@ def show_metrics(txs, filtered):
     col3.metric("Unique Rules",   unique_rules)
 
 def show_chart(filtered):
+    import altair as alt
     counts = Counter(r["rule"] for r in filtered)
     df = pd.DataFrame.from_dict(counts, orient='index', columns=['count']).reset_index()
     df.columns = ['rule', 'count']
@@ -154,7 +175,27 @@ def show_chart(filtered):
     ).properties(width='container', height=300)
     st.altair_chart(chart, use_container_width=True)
 
-def show_table_and_download(filtered):
+def show_top_entities(ranked):
+    if not ranked:
+        return
+    st.subheader("🚨 Highest-Risk Entities")
+    df = pd.DataFrame([
+        {
+            "entity": r["entity"],
+            "score":  r["score"],
+            "alerts": len(r["alerts"]),
+            "rules":  ", ".join(sorted({a[0] for a in r["alerts"]}))
+        }
+        for r in ranked
+    ])
+    st.dataframe(df, height=300)
+
+def show_table_and_download(filtered, export_format="csv"):
+    """
+    Alert table plus a download of the same rows. Unlike the agent's export,
+    this is not constant-memory: the table and the download button both
+    hold every alert in memory, so UI peak memory grows with the alert count.
+    """
     df = pd.DataFrame(filtered)
     if 'detail' in df.columns:
         df['detail'] = df['detail'].astype(str)
@@ -162,15 +203,19 @@ def show_table_and_download(filtered):
     st.subheader("⚠️ Alert Audit Trail")
     st.dataframe(df, height=400)
 
-    buf = io.StringIO()
-    writer = csv.DictWriter(buf, fieldnames=df.columns)
-    writer.writeheader()
-    writer.writerows(df.to_dict(orient='records'))
-
-    st.download_button(
-        label="Download Alerts as CSV",
-        data=buf.getvalue(),
-        file_name="compliance_alerts.csv",
-        mime="text/csv"
-    )
-
+    # Reuses the streaming writer for its formats; download_button reads the
+    # finished file into memory, and needs a BufferedReader, hence the reopen.
+    suffix, mime = EXPORT_FORMATS[export_format]
+    fd, path = tempfile.mkstemp(suffix=f".{suffix}")
+    os.close(fd)
+    try:
+        export_alerts(filtered, path, export_format, fieldnames=list(df.columns))
+        with open(path, "rb") as data:
+            st.download_button(
+                label=f"Download Alerts as {export_format.upper()}",
+                data=data,
+                file_name=f"compliance_alerts.{suffix}",
+                mime=mime
+            )
+    finally:
+        os.remove(path)